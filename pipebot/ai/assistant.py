@@ -1,8 +1,12 @@
 import json
+import random
+import re
 import sys
 import time
 import datetime
 import urllib3
+from botocore.exceptions import EventStreamError
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List
 from pipebot.aws import create_bedrock_client
 from pipebot.memory.manager import MemoryManager
@@ -12,6 +16,171 @@ from pipebot.ai.formatter import ResponseFormatter
 from pipebot.tools.tool_executor import ToolExecutor
 from pipebot.config import AppConfig
 
+TOOL_CONFIG = {
+    "tools": [
+        {
+            "toolSpec": {
+                "name": "aws",
+                "description": "Execute a read-only AWS CLI command for any AWS service. Allowed actions include commands starting with: analyze, check, describe, estimate, export, filter, generate, get, help, list, lookup, ls, preview, scan, search, show, summarize, test, validate, and view.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The AWS CLI command to execute, without the 'aws' prefix. Format: '<service> <action> [parameters]'. For example, use 'ec2 describe-instances' or 's3 ls s3://bucket-name'. The option '--profile' is not permitted, but '--region' can be used to specify a different region."
+                            }
+                        },
+                        "required": ["command"]
+                    }
+                }
+            }
+        },
+        {
+            "toolSpec": {
+                "name": "kubectl",
+                "description": "Execute a read-only kubectl command. Allowed actions include: api-resources, api-versions, cluster-info, describe, explain, get, logs, top, and version.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The kubectl command to execute, without the 'kubectl' prefix. For example, use 'get pods' instead of 'kubectl get pods'. The options '--kubeconfig', '--as', '--as-group', and '--token' are not permitted."
+                            }
+                        },
+                        "required": ["command"]
+                    }
+                }
+            }
+        },
+        {
+            "toolSpec": {
+                "name": "helm",
+                "description": "Execute a read-only Helm command. Allowed actions include: dependency, env, get, history, inspect, lint, list, search, show, status, template, verify, and version.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The Helm command to execute, without the 'helm' prefix. For example, use 'list' instead of 'helm list'. The options '--kube-context' and '--kubeconfig' are not permitted."
+                            }
+                        },
+                        "required": ["command"]
+                    }
+                }
+            }
+        },
+        {
+            "toolSpec": {
+                "name": "serper",
+                "description": "Search the web using Serper to find current information, documentation, examples, solutions to technical problems, verify technical details, check current best practices, and fact-check information. Use this tool whenever you need up-to-date information or need to verify your knowledge.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The search query to execute. Be specific and include technical terms when searching for technical information. Format your query to get the most relevant results."
+                            }
+                        },
+                        "required": ["command"]
+                    }
+                }
+            }
+        },
+        {
+            "toolSpec": {
+                "name": "python_exec",
+                "description": "Execute Python code in a secure sandbox environment. The code runs with restricted access to Python's built-in functions for safety. Available Modules: array, base64, binascii, bisect, bson, calendar, cmath, codecs, collections, datetime, difflib, enum, fractions, functools, gzip, hashlib, heapq, itertools, json, math, matplotlib, mpmath, numpy, operator, pandas, pymongo, re, random, secrets, scipy.special, sklearn, statistics, string, sympy, textwrap, time, timeit, unicodedata, uuid, zlib. Modules can be imported directly. Example: import math, import numpy as np, from datetime import datetime. Only safe, read-only operations are allowed.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The Python code to execute. The code should be complete and properly indented. Only safe operations are allowed."
+                            }
+                        },
+                        "required": ["command"]
+                    }
+                }
+            }
+        }
+    ]
+}
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+MAX_PARALLEL_TOOLS = 8
+
+MAX_TOOL_ITERATIONS = 25
+
+# Bedrock stream errors that are worth replaying the request for
+RETRYABLE_STREAM_ERRORS = frozenset({
+    'throttlingexception',
+    'serviceunavailableexception',
+    'modelstreamerrorexception',
+    'internalserverexception',
+})
+
+_TOOL_DISPATCH = {
+    'kubectl': ToolExecutor.kubectl,
+    'aws': ToolExecutor.aws,
+    'helm': ToolExecutor.helm,
+    'serper': ToolExecutor.serper,
+    'python_exec': ToolExecutor.python_exec,
+}
+
+SYSTEM_PROMPT = """Purpose: Technical assistant specializing in Linux, AWS, Kubernetes, and Python. Current date: {current_date}
+
+You must follow these guidelines:
+
+FORMATTING
+Format your responses professionally without emojis or decorative symbols. Use standard bullet points and plain text headers. Present technical information in a structured, easy-to-read format.
+
+ANALYSIS
+When analyzing information, clearly label the analysis section, use concise bullet points for key findings, and maintain clean indentation for configurations and details.
+
+TECHNICAL OUTPUT 
+Keep all technical output clean, consistently spaced, and well-organized. Focus on clarity and readability.
+
+SECURITY
+Maintain strict read-only access to services. Proactively suggest secure alternatives and adhere to AWS and Kubernetes best practices.
+
+SEARCH CAPABILITY
+You have the ability to search the internet using the 'serper' tool. Use it proactively when you need to verify information, find current documentation, or research solutions. Never say you cannot search - instead, use the serper tool to find the information.
+
+TONE
+Maintain professionalism while being helpful and approachable. Focus on accuracy and clarity in all responses."""
+
+class BufferedStreamWriter:
+    """Coalesce streamed text deltas into fewer terminal writes."""
+
+    def __init__(self, stream, max_chars: int = 256, max_delay: float = 0.05):
+        self.stream = stream
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._parts = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if ('\n' in text or self._size >= self.max_chars
+                or time.monotonic() - self._last_flush >= self.max_delay):
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.stream.write(''.join(self._parts))
+            self.stream.flush()
+            self._parts = []
+            self._size = 0
+        self._last_flush = time.monotonic()
+
 class AIAssistant:
     def __init__(self, app_config: AppConfig, debug=False, use_memory=True):
         self.app_config = app_config
@@ -21,218 +190,103 @@ class AIAssistant:
         self.use_memory = use_memory
         self.logger = Logger(app_config, debug)
         self.formatter = ResponseFormatter(app_config)
+        self._bedrock_client = None
+
+    @property
+    def bedrock_client(self):
+        if self._bedrock_client is None:
+            self._bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
+        return self._bedrock_client
+
+    def _reset_bedrock_client(self):
+        self._bedrock_client = None
+        return self.bedrock_client
         
     def generate_response(self, conversation_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        bedrock_client = None
-        try:
-            bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
-
-            current_query = conversation_history[-1]["content"]
-            if isinstance(current_query, list):
-                if len(current_query) == 1 and isinstance(current_query[0], dict):
-                    if "toolResult" in current_query[0]:
-                        tool_result = current_query[0]["toolResult"]
-                        if isinstance(tool_result, dict) and "content" in tool_result:
-                            current_query = str(tool_result["content"])
-                    else:
-                        current_query = current_query[0].get("text", "")
+        current_query = conversation_history[-1]["content"]
+        if isinstance(current_query, list):
+            if len(current_query) == 1 and isinstance(current_query[0], dict):
+                if "toolResult" in current_query[0]:
+                    tool_result = current_query[0]["toolResult"]
+                    if isinstance(tool_result, dict) and "content" in tool_result:
+                        current_query = str(tool_result["content"])
                 else:
-                    current_query = str(current_query)
-            
-            relevant_history = []
-            if self.use_memory and current_query:
-                relevant_history = self.memory_manager.get_relevant_history(current_query)
-                self.memory_manager.store_interaction("user", current_query)
-            
-            merged_history = relevant_history + conversation_history
-            
-            tool_config = {
-                "tools": [
-                    {
-                        "toolSpec": {
-                            "name": "aws",
-                            "description": "Execute a read-only AWS CLI command for any AWS service. Allowed actions include commands starting with: analyze, check, describe, estimate, export, filter, generate, get, help, list, lookup, ls, preview, scan, search, show, summarize, test, validate, and view.",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "command": {
-                                            "type": "string",
-                                            "description": "The AWS CLI command to execute, without the 'aws' prefix. Format: '<service> <action> [parameters]'. For example, use 'ec2 describe-instances' or 's3 ls s3://bucket-name'. The option '--profile' is not permitted, but '--region' can be used to specify a different region."
-                                        }
-                                    },
-                                    "required": ["command"]
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "toolSpec": {
-                            "name": "kubectl",
-                            "description": "Execute a read-only kubectl command. Allowed actions include: api-resources, api-versions, cluster-info, describe, explain, get, logs, top, and version.",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "command": {
-                                            "type": "string",
-                                            "description": "The kubectl command to execute, without the 'kubectl' prefix. For example, use 'get pods' instead of 'kubectl get pods'. The options '--kubeconfig', '--as', '--as-group', and '--token' are not permitted."
-                                        }
-                                    },
-                                    "required": ["command"]
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "toolSpec": {
-                            "name": "helm",
-                            "description": "Execute a read-only Helm command. Allowed actions include: dependency, env, get, history, inspect, lint, list, search, show, status, template, verify, and version.",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "command": {
-                                            "type": "string",
-                                            "description": "The Helm command to execute, without the 'helm' prefix. For example, use 'list' instead of 'helm list'. The options '--kube-context' and '--kubeconfig' are not permitted."
-                                        }
-                                    },
-                                    "required": ["command"]
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "toolSpec": {
-                            "name": "serper",
-                            "description": "Search the web using Serper to find current information, documentation, examples, solutions to technical problems, verify technical details, check current best practices, and fact-check information. Use this tool whenever you need up-to-date information or need to verify your knowledge.",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "command": {
-                                            "type": "string",
-                                            "description": "The search query to execute. Be specific and include technical terms when searching for technical information. Format your query to get the most relevant results."
-                                        }
-                                    },
-                                    "required": ["command"]
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "toolSpec": {
-                            "name": "python_exec",
-                            "description": "Execute Python code in a secure sandbox environment. The code runs with restricted access to Python's built-in functions for safety. Available Modules: array, base64, binascii, bisect, bson, calendar, cmath, codecs, collections, datetime, difflib, enum, fractions, functools, gzip, hashlib, heapq, itertools, json, math, matplotlib, mpmath, numpy, operator, pandas, pymongo, re, random, secrets, scipy.special, sklearn, statistics, string, sympy, textwrap, time, timeit, unicodedata, uuid, zlib. Modules can be imported directly. Example: import math, import numpy as np, from datetime import datetime. Only safe, read-only operations are allowed.",
-                            "inputSchema": {
-                                "json": {
-                                    "type": "object",
-                                    "properties": {
-                                        "command": {
-                                            "type": "string",
-                                            "description": "The Python code to execute. The code should be complete and properly indented. Only safe operations are allowed."
-                                        }
-                                    },
-                                    "required": ["command"]
-                                }
-                            }
-                        }
-                    }
-                ]
-            }
-
-            try:
-                response = self._invoke_model(self._build_prompt(merged_history), tool_config, bedrock_client)
+                    current_query = current_query[0].get("text", "")
+            else:
+                current_query = str(current_query)
+        
+        relevant_history = []
+        if self.use_memory and current_query:
+            relevant_history = self.memory_manager.get_and_store(current_query)
+        
+        response_text = None
+        tool_iterations = 0
+        try:
+            while True:
+                merged_history = relevant_history + conversation_history
+                response = self._invoke_model(self._build_prompt(merged_history, current_query), TOOL_CONFIG, self.bedrock_client)
                 output_message = response['output']['message']
                 stop_reason = response['stopReason']
 
-                if stop_reason == 'tool_use':
-                    tool_results = self._process_tool_use(output_message)
-                    
-                    if tool_results:
-                        try:
-                            conversation_history.append({
-                                'role': 'assistant',
-                                'content': output_message['content']
-                            })
-                            
-                            tool_results_text = json.dumps(tool_results, indent=2)
-                            
-                            conversation_history.append({
-                                'role': 'user',
-                                'content': [{
-                                    'toolResult': tool_results[0]['toolResult']
-                                }]
-                            })
-                            
-                            return self.generate_response(conversation_history)
-                        except Exception as e:
-                            self.logger.error(f"Error processing tool results: {str(e)}")
-                            return conversation_history
-                    else:
-                        conversation_history.append({
-                            'role': 'assistant',
-                            'content': [{
-                                'text': "I proposed to use a tool, but the execution was skipped. How else can I assist you?"
-                            }]
-                        })
-                else:
+                if stop_reason != 'tool_use':
                     conversation_history.append({
                         'role': 'assistant',
                         'content': output_message['content']
                     })
+                    response_text = response['assistant_text']
+                    break
 
-                if self.use_memory and conversation_history[-1]["role"] == "assistant":
-                    assistant_response = conversation_history[-1]["content"]
-                    if isinstance(assistant_response, list):
-                        response_text = ' '.join(
-                            item.get("text", "") 
-                            for item in assistant_response 
-                            if isinstance(item, dict) and "text" in item
-                        )
-                    else:
-                        response_text = str(assistant_response)
-                    self.memory_manager.store_interaction("assistant", response_text)
+                tool_results = self._process_tool_use(output_message)
+                if not tool_results:
+                    response_text = "I proposed to use a tool, but the execution was skipped. How else can I assist you?"
+                    conversation_history.append({
+                        'role': 'assistant',
+                        'content': [{
+                            'text': response_text
+                        }]
+                    })
+                    break
 
-            except KeyboardInterrupt:
-                sys.stdout.write(f"\n{self.app_config.colors.green}AI response halted by user.{self.app_config.colors.reset}\n")
                 conversation_history.append({
                     'role': 'assistant',
-                    'content': [{
-                        'text': '[Response halted by user]'
-                    }]
+                    'content': output_message['content']
+                })
+                conversation_history.append({
+                    'role': 'user',
+                    'content': tool_results
                 })
-            
-            return conversation_history
 
-        finally:
-            pass
+                tool_iterations += 1
+                if tool_iterations >= MAX_TOOL_ITERATIONS:
+                    response_text = f"I stopped after {MAX_TOOL_ITERATIONS} rounds of tool calls without reaching an answer. Let me know if you want me to continue."
+                    self.logger.warning(response_text)
+                    conversation_history.append({
+                        'role': 'assistant',
+                        'content': [{
+                            'text': response_text
+                        }]
+                    })
+                    break
 
-    def _build_prompt(self, conversation_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if self.use_memory and response_text:
+                self.memory_manager.store_interaction("assistant", response_text)
+
+        except KeyboardInterrupt:
+            sys.stdout.write(f"\n{self.app_config.colors.green}AI response halted by user.{self.app_config.colors.reset}\n")
+            conversation_history.append({
+                'role': 'assistant',
+                'content': [{
+                    'text': '[Response halted by user]'
+                }]
+            })
+        
+        return conversation_history
+
+    def _build_prompt(self, conversation_history: List[Dict[str, Any]], current_query: str) -> List[Dict[str, Any]]:
         messages = []
         memory_context = []
         current_conversation = []
         
-        current_query = None
-        for msg in reversed(conversation_history):
-            if msg["role"] == "user":
-                if isinstance(msg.get("content"), str):
-                    current_query = msg["content"]
-                elif isinstance(msg.get("content"), list) and len(msg["content"]) > 0:
-                    content_item = msg["content"][0]
-                    if isinstance(content_item, dict):
-                        if "text" in content_item:
-                            current_query = content_item["text"]
-                        elif "toolResult" in content_item:
-                            tool_result = content_item["toolResult"]
-                            if isinstance(tool_result, dict) and "content" in tool_result:
-                                content_list = tool_result["content"]
-                                if isinstance(content_list, list) and len(content_list) > 0:
-                                    first_content = content_list[0]
-                                    if isinstance(first_content, dict) and "text" in first_content:
-                                        current_query = first_content["text"]
-                break
-        
         if current_query:
             kb_context = self.knowledge_base.get_relevant_context(current_query)
             if kb_context:
@@ -249,31 +303,25 @@ class AIAssistant:
                     }]
                 })
         
-        for idx, message in enumerate(conversation_history):
+        for message in conversation_history:
             if message.get("from_memory", False):
-                cleaned_message = {
-                    "role": message["role"],
-                    "content": []
-                }
-                
+                texts = []
                 for content_item in message["content"]:
                     if isinstance(content_item, dict):
-                        if "toolUse" in content_item:
+                        if "text" in content_item:
+                            texts.append(content_item["text"])
+                        elif "toolUse" in content_item:
                             tool_info = content_item["toolUse"]
-                            cleaned_message["content"].append({
-                                "text": f"[Historical command: {tool_info['name']} {json.dumps(tool_info['input'])}]"
-                            })
+                            texts.append(f"[Historical command: {tool_info['name']} {json.dumps(tool_info['input'])}]")
                         elif "toolResult" in content_item:
                             tool_result = content_item["toolResult"]
-                            cleaned_message["content"].append({
-                                "text": f"[Historical result: {json.dumps(tool_result['content'])}]"
-                            })
+                            texts.append(f"[Historical result: {json.dumps(tool_result['content'])}]")
                         else:
-                            cleaned_message["content"].append(content_item)
+                            texts.append('')
                     else:
-                        cleaned_message["content"].append({"text": str(content_item)})
+                        texts.append(str(content_item))
                 
-                memory_context.append(cleaned_message)
+                memory_context.append(f"{message['role']}: {' '.join(texts)}")
             else:
                 if message["role"] == "user" and isinstance(message["content"], list) and len(message["content"]) == 1:
                     content_item = message["content"][0]
@@ -306,11 +354,7 @@ class AIAssistant:
             context_summary = {
                 "role": "user",
                 "content": [{
-                    "text": "Context from previous conversation: " + 
-                            " | ".join([
-                                f"{msg['role']}: {' '.join(item.get('text', '') for item in msg['content'])}" 
-                                for msg in memory_context
-                            ])
+                    "text": "Context from previous conversation: " + " | ".join(memory_context)
                 }]
             }
             messages.append(context_summary)
@@ -330,132 +374,116 @@ class AIAssistant:
         retry_delay = 2
         
         for attempt in range(max_retries):
-            try:
-                max_tokens = self.app_config.aws.max_tokens
-                
-                inference_config = {
-                    "temperature": 0.0,
-                    "maxTokens": max_tokens
-                }
-
-                current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-                system_prompt = f"""Purpose: Technical assistant specializing in Linux, AWS, Kubernetes, and Python. Current date: {current_date}
-
-You must follow these guidelines:
-
-FORMATTING
-Format your responses professionally without emojis or decorative symbols. Use standard bullet points and plain text headers. Present technical information in a structured, easy-to-read format.
-
-ANALYSIS
-When analyzing information, clearly label the analysis section, use concise bullet points for key findings, and maintain clean indentation for configurations and details.
-
-TECHNICAL OUTPUT 
-Keep all technical output clean, consistently spaced, and well-organized. Focus on clarity and readability.
+            max_tokens = self.app_config.aws.max_tokens
+            
+            inference_config = {
+                "temperature": 0.0,
+                "maxTokens": max_tokens
+            }
 
-SECURITY
-Maintain strict read-only access to services. Proactively suggest secure alternatives and adhere to AWS and Kubernetes best practices.
+            current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+            system_prompt = SYSTEM_PROMPT.format(current_date=current_date)
 
-SEARCH CAPABILITY
-You have the ability to search the internet using the 'serper' tool. Use it proactively when you need to verify information, find current documentation, or research solutions. Never say you cannot search - instead, use the serper tool to find the information.
+            if self.debug:
+                debug_payload = {
+                    "messages": messages,
+                    "system": [{"text": system_prompt}],
+                    "inferenceConfig": inference_config,
+                    "toolConfig": tool_config
+                }
+                self.logger.debug(f"Bedrock Request:\n{json.dumps(debug_payload, indent=2)}\n")
 
-TONE
-Maintain professionalism while being helpful and approachable. Focus on accuracy and clarity in all responses."""
+            response = bedrock_client.converse_stream(
+                modelId=self.app_config.aws.model_id,
+                messages=messages,
+                system=[{"text": system_prompt}],
+                inferenceConfig=inference_config,
+                toolConfig=tool_config
+            )
 
-                if self.debug:
-                    debug_payload = {
-                        "messages": messages,
-                        "system": [{"text": system_prompt}],
-                        "inferenceConfig": inference_config,
-                        "toolConfig": tool_config
-                    }
-                    self.logger.debug(f"Bedrock Request:\n{json.dumps(debug_payload, indent=2)}\n")
-
-                response = bedrock_client.converse_stream(
-                    modelId=self.app_config.aws.model_id,
-                    messages=messages,
-                    system=[{"text": system_prompt}],
-                    inferenceConfig=inference_config,
-                    toolConfig=tool_config
-                )
-
-                stop_reason = ""
-                message = {}
-                content = []
-                message['content'] = content
-                text = ''
-                tool_use = {}
-
-                try:
-                    for chunk in response['stream']:
-                        if 'messageStart' in chunk:
-                            message['role'] = chunk['messageStart']['role']
-                        elif 'contentBlockStart' in chunk:
-                            tool = chunk['contentBlockStart']['start']['toolUse']
-                            tool_use['toolUseId'] = tool['toolUseId']
-                            tool_use['name'] = tool['name']
-                        elif 'contentBlockDelta' in chunk:
-                            delta = chunk['contentBlockDelta']['delta']
-                            if 'toolUse' in delta:
-                                if 'input' not in tool_use:
-                                    tool_use['input'] = ''
-                                tool_use['input'] += delta['toolUse']['input']
-                            elif 'text' in delta:
-                                text += delta['text']
-                                sys.stdout.write(delta['text'])
-                                sys.stdout.flush()
-                        elif 'contentBlockStop' in chunk:
-                            if 'input' in tool_use:
-                                tool_use['input'] = json.loads(tool_use['input'])
-                                content.append({'toolUse': tool_use})
-                                tool_use = {}
-                            else:
-                                content.append({'text': text})
-                                text = ''
-                        elif 'messageStop' in chunk:
-                            stop_reason = chunk['messageStop']['stopReason']
-
-                except (urllib3.exceptions.ReadTimeoutError, TimeoutError) as e:
-                    if attempt < max_retries - 1:
-                        self.logger.info(f"Response timeout, retrying... ({attempt + 1}/{max_retries})")
-                        time.sleep(retry_delay * (attempt + 1))
-                        bedrock_client = create_bedrock_client(self.app_config)
-                        continue
-                    else:
-                        self.logger.error("Maximum retries reached. The response was incomplete.")
-                        if content:
-                            return {"output": {"message": message}, "stopReason": "timeout"}
-                        raise
+            stop_reason = ""
+            message = {}
+            content = []
+            message['content'] = content
+            text = ''
+            text_blocks = []
+            tool_use = {}
+            tool_input = []
+            writer = BufferedStreamWriter(sys.stdout)
 
-                return {"output": {"message": message}, "stopReason": stop_reason}
+            try:
+                for chunk in response['stream']:
+                    if 'messageStart' in chunk:
+                        message['role'] = chunk['messageStart']['role']
+                    elif 'contentBlockStart' in chunk:
+                        tool = chunk['contentBlockStart']['start']['toolUse']
+                        tool_use['toolUseId'] = tool['toolUseId']
+                        tool_use['name'] = sys.intern(tool['name'])
+                    elif 'contentBlockDelta' in chunk:
+                        delta = chunk['contentBlockDelta']['delta']
+                        if 'toolUse' in delta:
+                            tool_input.append(delta['toolUse']['input'])
+                        elif 'text' in delta:
+                            text += delta['text']
+                            writer.write(delta['text'])
+                    elif 'contentBlockStop' in chunk:
+                        writer.flush()
+                        if tool_input:
+                            tool_use['input'] = json.loads(''.join(tool_input))
+                            content.append({'toolUse': tool_use})
+                            tool_use = {}
+                            tool_input = []
+                        else:
+                            content.append({'text': text})
+                            text_blocks.append(text)
+                            text = ''
+                    elif 'messageStop' in chunk:
+                        stop_reason = chunk['messageStop']['stopReason']
 
-            except Exception as e:
+            except (urllib3.exceptions.ReadTimeoutError, TimeoutError) as e:
                 if attempt < max_retries - 1:
-                    self.logger.info(f"Error occurred, retrying... ({attempt + 1}/{max_retries})")
+                    self.logger.info(f"Response timeout, retrying... ({attempt + 1}/{max_retries})")
                     time.sleep(retry_delay * (attempt + 1))
-                    bedrock_client = create_bedrock_client(self.app_config)
+                    bedrock_client = self._reset_bedrock_client()
+                    continue
+                else:
+                    self.logger.error("Maximum retries reached. The response was incomplete.")
+                    if content:
+                        return {"output": {"message": message}, "stopReason": "timeout", "assistant_text": ' '.join(text_blocks)}
+                    raise
+            except EventStreamError as e:
+                error_code = e.response.get('Error', {}).get('Code', '')
+                if error_code.lower() not in RETRYABLE_STREAM_ERRORS:
+                    raise
+                if attempt < max_retries - 1:
+                    self.logger.info(f"Response interrupted ({error_code}), retrying... ({attempt + 1}/{max_retries})")
+                    time.sleep(random.uniform(0, retry_delay * 2 ** attempt))
                     continue
                 else:
                     self.logger.error(f"Maximum retries reached. Error: {str(e)}")
                     raise
+            finally:
+                writer.flush()
 
-    def _print_thought_process(self, output_message: Dict[str, Any]):
-        has_tool_use = any('toolUse' in content for content in output_message['content'])
-        if has_tool_use:
-            for content in output_message['content']:
-                if 'toolUse' in content:
-                    tool = content['toolUse']
-                    print(f"└── {tool['name']} {tool['input']['command']}")
+            return {"output": {"message": message}, "stopReason": stop_reason, "assistant_text": ' '.join(text_blocks)}
 
     def _simplify_output_for_context(self, output: Any) -> Dict[str, Any]:
+        max_output_size = self.app_config.max_output_size
         if isinstance(output, dict):
             output = json.dumps(output, ensure_ascii=False, indent=2)
+        elif not isinstance(output, str):
+            output = str(output)
         
-        output_str = str(output)
-        simplified = ' '.join(output_str.split())
+        truncated = len(output) > max_output_size * 2
+        if truncated:
+            output = output[:max_output_size * 2]
+        simplified = WHITESPACE_RE.sub(' ', output).strip()
         
-        truncated = len(simplified) > self.app_config.max_output_size
+        if len(simplified) > max_output_size:
+            simplified = simplified[:max_output_size]
+            truncated = True
         if truncated:
-            simplified = simplified[:self.app_config.max_output_size] + "..."
+            simplified += "..."
         
         return {
             "content": simplified,
@@ -464,80 +492,105 @@ Maintain professionalism while being helpful and approachable. Focus on accuracy
 
     def _process_tool_use(self, output_message: Dict[str, Any]) -> List[Dict[str, Any]]:
         tool_results = []
-        try:
-            for content in output_message['content']:
-                if 'toolUse' in content:
-                    tool = content['toolUse']
+        tools = [content['toolUse'] for content in output_message['content'] if 'toolUse' in content]
+        for tool, result in zip(tools, self._run_tools(tools)):
+            try:
+                print()
+                print(f"└─ {tool['name']} {tool['input'].get('command', '')}")
+                
+                if self.debug:
+                    self.logger.debug("%s command result:", tool['name'])
                     
-                    result = None
-                    if tool['name'] == 'kubectl':
-                        result = ToolExecutor.kubectl(tool['input']['command'], app_config=self.app_config)
-                    elif tool['name'] == 'aws':
-                        result = ToolExecutor.aws(tool['input']['command'], app_config=self.app_config)
-                    elif tool['name'] == 'helm':
-                        result = ToolExecutor.helm(tool['input']['command'], app_config=self.app_config)
-                    elif tool['name'] == 'serper':
-                        command = tool['input'].get('command')
-                        result = ToolExecutor.serper(command, app_config=self.app_config)
-                    elif tool['name'] == 'python_exec':
-                        result = ToolExecutor.python_exec(tool['input']['command'])
+                    if 'output' in result:
+                        self._print_formatted_output(result['output'])
+                    elif 'error' in result:
+                        self.logger.error(f"Error: {result['error']}")
                     else:
-                        continue
-
+                        print(json.dumps(result, indent=2))
                     print()
-                    print(f"└─ {tool['name']} {tool['input']['command']}")
-                    
-                    if self.debug:
-                        self.logger.debug(f"{tool['name']} command result:")
-                        
-                        if 'output' in result:
-                            self._print_formatted_output(result['output'])
-                        elif 'error' in result:
-                            self.logger.error(f"Error: {result['error']}")
-                        else:
-                            print(json.dumps(result, indent=2))
-                        print()
-                    else:
-                        if 'output' in result:
-                            print(f"   └─ {self.app_config.colors.green}✓ Success{self.app_config.colors.reset}")
-                        elif 'error' in result:
-                            print(f"   └─ {self.app_config.colors.red}✗ Error{self.app_config.colors.reset}")
-                        else:
-                            print(f"   └─ {self.app_config.colors.blue}? Unknown status{self.app_config.colors.reset}")
-
+                else:
                     if 'output' in result:
-                        simplified_result = self._simplify_output_for_context(result['output'])
-                        tool_result = {
-                            "toolUseId": tool['toolUseId'],
-                            "content": [
-                                {"text": simplified_result["content"]},
-                                {"text": f"[Output truncated: {simplified_result['truncated']}]"}
-                            ]
-                        }
+                        print(f"   └─ {self.app_config.colors.green}✓ Success{self.app_config.colors.reset}")
                     elif 'error' in result:
-                        tool_result = {
-                            "toolUseId": tool['toolUseId'],
-                            "content": [
-                                {"text": f"Error: {result['error']}"},
-                                {"text": "[Output truncated: false]"}
-                            ]
-                        }
+                        print(f"   └─ {self.app_config.colors.red}✗ Error{self.app_config.colors.reset}")
                     else:
-                        tool_result = {
-                            "toolUseId": tool['toolUseId'],
-                            "content": [
-                                {"text": str(result)},
-                                {"text": "[Output truncated: false]"}
-                            ]
-                        }
-                    
-                    tool_results.append({"toolResult": tool_result})
-                    
-        except Exception as e:
-            print(f"{self.app_config.colors.red}[ERROR] Error in _process_tool_use: {str(e)}{self.app_config.colors.reset}")
+                        print(f"   └─ {self.app_config.colors.blue}? Unknown status{self.app_config.colors.reset}")
+
+                if 'output' in result:
+                    simplified_result = self._simplify_output_for_context(result['output'])
+                    tool_result = {
+                        "toolUseId": tool['toolUseId'],
+                        "content": [
+                            {"text": simplified_result["content"]},
+                            {"text": f"[Output truncated: {simplified_result['truncated']}]"}
+                        ]
+                    }
+                elif 'error' in result:
+                    tool_result = {
+                        "toolUseId": tool['toolUseId'],
+                        "content": [
+                            {"text": f"Error: {result['error']}"},
+                            {"text": "[Output truncated: false]"}
+                        ]
+                    }
+                else:
+                    tool_result = {
+                        "toolUseId": tool['toolUseId'],
+                        "content": [
+                            {"text": str(result)},
+                            {"text": "[Output truncated: false]"}
+                        ]
+                    }
+            except Exception as e:
+                self.logger.exception(f"Error in _process_tool_use: {str(e)}")
+                tool_result = {
+                    "toolUseId": tool['toolUseId'],
+                    "content": [
+                        {"text": f"Error: {str(e)}"},
+                        {"text": "[Output truncated: false]"}
+                    ]
+                }
+            
+            tool_results.append({"toolResult": tool_result})
         
         return tool_results
 
+    def _run_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        parallel = [i for i, tool in enumerate(tools) if tool['name'] != 'python_exec']
+        if len(parallel) < 2:
+            return [self._run_tool(tool) for tool in tools]
+        
+        results = [None] * len(tools)
+        executor = ThreadPoolExecutor(max_workers=min(len(parallel), MAX_PARALLEL_TOOLS))
+        futures = {i: executor.submit(self._run_tool, tools[i]) for i in parallel}
+        try:
+            # python_exec swaps sys.stdout, so it stays on the calling thread
+            for i, tool in enumerate(tools):
+                if i not in futures:
+                    results[i] = self._run_tool(tool)
+            for i, future in futures.items():
+                results[i] = future.result()
+        except BaseException:
+            # Don't block Ctrl+C on tools that are still running
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+            raise
+        executor.shutdown()
+        return results
+
+    def _run_tool(self, tool: Dict[str, Any]) -> Dict[str, Any]:
+        executor = _TOOL_DISPATCH.get(tool['name'])
+        if executor is None:
+            return {"error": f"Unknown tool: {tool['name']}"}
+        try:
+            command = tool['input'].get('command')
+            if tool['name'] == 'python_exec':
+                return executor(command)
+            return executor(command, app_config=self.app_config)
+        except Exception as e:
+            return {"error": str(e)}
+
     def _print_formatted_output(self, output: Any):
         if isinstance(output, dict):
             if 'organic' in output:
@@ -1,7 +1,14 @@
 import json
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
 from pipebot.config import AppConfig
 
+EMBEDDING_CACHE_SIZE = 128
+
+_embedding_cache: "OrderedDict[Tuple[str, str, int], List[float]]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
 def generate_embeddings(text: str, app_config: AppConfig, bedrock_client) -> List[float]:
     if not isinstance(text, str):
         if isinstance(text, (list, dict)):
@@ -13,6 +20,22 @@ def generate_embeddings(text: str, app_config: AppConfig, bedrock_client) -> Lis
     if not text.strip():
         raise ValueError("Cannot generate embeddings for empty text")
     
+    key = (text, app_config.aws.embedding_model, app_config.aws.embedding_dimension)
+    with _embedding_cache_lock:
+        embedding = _embedding_cache.get(key)
+        if embedding is not None:
+            _embedding_cache.move_to_end(key)
+            return embedding
+    
+    embedding = _generate_embeddings(text, app_config, bedrock_client)
+    
+    with _embedding_cache_lock:
+        _embedding_cache[key] = embedding
+        if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+    return embedding
+
+def _generate_embeddings(text: str, app_config: AppConfig, bedrock_client) -> List[float]:
     estimated_tokens = len(text) // 2
     max_tokens = 7000
     
@@ -43,5 +66,5 @@ def generate_embeddings(text: str, app_config: AppConfig, bedrock_client) -> Lis
         if "Too many input tokens" in str(e):
             char_limit = max_tokens
             truncated_text = text[:char_limit] + "..."
-            return generate_embeddings(truncated_text, app_config, bedrock_client)
+            return _generate_embeddings(truncated_text, app_config, bedrock_client)
         raise RuntimeError(f"Failed to generate embeddings: {str(e)}") 
\ No newline at end of file
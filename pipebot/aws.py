@@ -7,8 +7,8 @@ def create_bedrock_client(app_config: AppConfig, debug=False):
         service_name='bedrock-runtime',
         region_name=app_config.aws.region_name,
         config=boto3.session.Config(
-            retries={'max_attempts': 3, 'mode': 'adaptive'},
+            retries={'max_attempts': 4, 'mode': 'adaptive'},
             read_timeout=1000,
-            tcp_keepalive=False
+            tcp_keepalive=True
         )
     ) 
\ No newline at end of file
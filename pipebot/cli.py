@@ -30,6 +30,8 @@ class CLIParser:
         debug_group = parser.add_argument_group('Debug options')
         debug_group.add_argument('--debug', action='store_true',
                                 help='Enable debug mode')
+        debug_group.add_argument('--profile', action='store_true',
+                                help='Profile the run and print the top calls to stderr on exit')
 
         kb_group = parser.add_argument_group('Knowledge Base options')
         kb_group.add_argument('--scan', action='store_true',
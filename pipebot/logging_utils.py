@@ -1,3 +1,5 @@
+import traceback
+
 class Logger:
     def __init__(self, app_config, debug=False):
         self.app_config = app_config
@@ -8,9 +10,16 @@ class Logger:
     
     def error(self, message: str):
         print(f"{self.app_config.colors.red}[ERROR] {message}{self.app_config.colors.reset}")
+
+    def exception(self, message: str):
+        self.error(message)
+        if self.debug_enabled:
+            traceback.print_exc()
     
-    def debug(self, message: str):
+    def debug(self, message: str, *args):
         if self.debug_enabled:
+            if args:
+                message = message % args
             print(f"{self.app_config.colors.blue}[DEBUG] {message}{self.app_config.colors.reset}")
     
     def success(self, message: str):
@@ -1,3 +1,6 @@
+import atexit
+import cProfile
+import pstats
 import sys
 from pipebot.cli import CLIParser
 from pipebot.logging_utils import Logger
@@ -43,11 +46,22 @@ def run_interactive_mode(app_config, assistant, conversation_history):
             except EOFError:
                 break
 
+def print_profile_stats(profiler, limit=30):
+    """Print the most expensive calls recorded by the profiler to stderr."""
+    profiler.disable()
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stats.sort_stats('cumulative').print_stats(limit)
+
 def main():
     cli = CLIParser()
     args = cli.parse_args()
     logger = Logger(cli.app_config, args.debug)
 
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(print_profile_stats, profiler)
+
     # Handle standalone commands first
     if args.clear:
         try:
@@ -55,7 +69,7 @@ def main():
             try:
                 count = memory_manager.collection.count()
                 if count > 0:
-                    results = memory_manager.collection.get()
+                    results = memory_manager.collection.get(include=[])
                     memory_manager.collection.delete(ids=results['ids'])
                     logger.success("Conversation memory cleared successfully.")
                 else:
@@ -105,6 +119,8 @@ def main():
     cli.check_for_pipe()
 
     assistant = AIAssistant(cli.app_config, debug=args.debug, use_memory=not args.no_memory)
+    if assistant.memory_manager:
+        atexit.register(assistant.memory_manager.close)
     
     if not args.non_interactive:
         print_interaction_info(cli.app_config)
@@ -0,0 +1,16 @@
+import functools
+from pathlib import Path
+import chromadb
+from chromadb.config import Settings
+from pipebot.config import AppConfig
+
+@functools.lru_cache(maxsize=None)
+def _persistent_client(path: str):
+    Path(path).mkdir(parents=True, exist_ok=True)
+    return chromadb.PersistentClient(
+        path=path,
+        settings=Settings(anonymized_telemetry=False)
+    )
+
+def create_chroma_client(app_config: AppConfig):
+    return _persistent_client(app_config.storage.memory_dir)
@@ -1,17 +1,16 @@
 import datetime
 import hashlib
 import json
+import stat
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-import chromadb
-from chromadb.config import Settings
+from typing import Any, Dict, List, Optional, Tuple
 from tqdm import tqdm
 from pipebot.aws import create_bedrock_client
 from pipebot.ai.embeddings import generate_embeddings
 from pipebot.config import AppConfig
 from pipebot.logging_utils import Logger
+from pipebot.memory.chroma import create_chroma_client
 from pipebot.utils.token_estimator import TokenEstimator
-import chromadb.errors
 
 class KnowledgeBase:
     MAX_FILE_SIZE = 250_000
@@ -22,11 +21,15 @@ class KnowledgeBase:
         self.app_config = app_config
         self.debug = debug
         self.logger = Logger(app_config, debug)
-        self.client = chromadb.PersistentClient(
-            path=self.app_config.storage.memory_dir,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        self.client = create_chroma_client(app_config)
         self.collection = self._get_or_create_collection()
+        self._bedrock_client = None
+
+    @property
+    def bedrock_client(self):
+        if self._bedrock_client is None:
+            self._bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
+        return self._bedrock_client
 
     def _get_or_create_collection(self):
         try:
@@ -37,7 +40,7 @@ class KnowledgeBase:
                 metadata={"dimension": self.app_config.aws.embedding_dimension}
             )
 
-    def _chunk_text(self, text: str, file_path: str, max_tokens: int = 500, overlap_tokens: int = 50) -> List[Dict[str, Any]]:
+    def _chunk_text(self, text: str, file_path: str, max_tokens: int = MAX_CHUNK_TOKENS, overlap_tokens: int = OVERLAP_TOKENS) -> List[Dict[str, Any]]:
         if not text or not text.strip():
             return []
         
@@ -84,6 +87,7 @@ class KnowledgeBase:
         if current_chunk:
             chunks.append(' '.join(current_chunk))
         
+        timestamp = datetime.datetime.now().isoformat()
         processed_chunks = []
         for idx, chunk in enumerate(chunks):
             chunk_hash = hashlib.md5(chunk.encode()).hexdigest()[:8]
@@ -98,7 +102,7 @@ class KnowledgeBase:
                     "content_hash": file_content_hash,
                     "chunk_hash": chunk_hash,
                     "chunk_index": idx,
-                    "timestamp": datetime.datetime.now().isoformat()
+                    "timestamp": timestamp
                 }
             })
         
@@ -112,28 +116,34 @@ class KnowledgeBase:
         cache_dir = Path(self.app_config.storage.memory_dir) / "embedding_cache"
         cache_dir.mkdir(exist_ok=True)
         
-        bedrock_client = None
+        bedrock_client = self.bedrock_client
         try:
-            bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
             supported_extensions = {'.txt', '.md', '.mdx', '.html', '.yaml', '.yml', 
                                  '.lit', '.asciidoc', '.rst'}
             
             self.logger.info("Scanning knowledge base directory...")
-            files = [f for f in kb_path.rglob('*') 
-                    if f.is_file() 
-                    and f.suffix in supported_extensions 
-                    and f.stat().st_size < self.MAX_FILE_SIZE]
-            
-            large_files = [f for f in kb_path.rglob('*') 
-                          if f.is_file() 
-                          and f.suffix in supported_extensions 
-                          and f.stat().st_size >= self.MAX_FILE_SIZE]
+            files = []
+            large_files = []
+            for f in kb_path.rglob('*'):
+                if f.suffix not in supported_extensions:
+                    continue
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                if st.st_size < self.MAX_FILE_SIZE:
+                    files.append(f)
+                else:
+                    large_files.append((f, st.st_size))
+
             if large_files:
-                self.logger.warning(f"Skipping {len(large_files)} files larger than 250KB:")
-                for f in large_files:
+                self.logger.warning(f"Skipping {len(large_files)} files larger than {self.MAX_FILE_SIZE // 1_000}KB:")
+                for f, size in large_files:
                     self.logger.warning(
                         f"  - {f.relative_to(kb_path)} "
-                        f"({f.stat().st_size / 1_000:.1f}KB)"
+                        f"({size / 1_000:.1f}KB)"
                     )
                     self.logger.info(
                         f"    Consider splitting this file into smaller documents "
@@ -144,6 +154,7 @@ class KnowledgeBase:
             
             self.logger.info("Checking existing documents...")
             existing_docs = {}
+            existing_docs_known = False
             try:
                 results = self.collection.get(
                     include=['metadatas']
@@ -152,19 +163,19 @@ class KnowledgeBase:
                     for metadata in results['metadatas']:
                         if 'source' in metadata and 'content_hash' in metadata:
                             existing_docs[metadata['source']] = metadata['content_hash']
+                existing_docs_known = True
             except Exception as e:
                 self.logger.error(f"Error fetching existing documents: {str(e)}")
 
             files_to_remove = set(existing_docs.keys()) - current_files
             if files_to_remove:
                 self.logger.info(f"Removing {len(files_to_remove)} old files...")
-                for file_path in tqdm(files_to_remove, desc="Removing old files"):
-                    try:
-                        self.collection.delete(
-                            where={"source": file_path}
-                        )
-                    except Exception as e:
-                        self.logger.error(f"Error removing {file_path}: {str(e)}")
+                try:
+                    self.collection.delete(
+                        where={"source": {"$in": sorted(files_to_remove)}}
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error removing old files: {str(e)}")
 
             self.logger.info("Identifying files to process...")
             files_to_process = []
@@ -193,21 +204,26 @@ class KnowledgeBase:
                 
                 for file_path, content in tqdm(files_to_process, desc="Processing files"):
                     try:
-                        self.collection.delete(
-                            where={"source": str(file_path)}
-                        )
+                        if str(file_path) in existing_docs or not existing_docs_known:
+                            self.collection.delete(
+                                where={"source": str(file_path)}
+                            )
                         
                         chunks = self._chunk_text(content, file_path)
                         if not chunks:
                             continue
                         
+                        cache_file = cache_dir / f"{chunks[0]['metadata']['file_hash']}.json"
+                        embedding_cache = self._load_embedding_cache(cache_file)
                         chunk_embeddings = []
                         chunk_ids = []
                         chunk_texts = []
                         chunk_metadatas = []
+                        chunk_cache_keys = []
                         
                         for chunk in tqdm(chunks, desc=f"Processing chunks for {file_path.name}", leave=False):
-                            cached_embedding = self._get_cached_embedding(chunk["text"], cache_dir / f"{chunk['metadata']['file_hash']}.json")
+                            cache_key = self._embedding_cache_key(chunk["text"])
+                            cached_embedding = embedding_cache.get(cache_key)
                             if cached_embedding:
                                 chunk_embeddings.append(cached_embedding)
                             else:
@@ -216,6 +232,7 @@ class KnowledgeBase:
                             chunk_ids.append(chunk["id"])
                             chunk_texts.append(chunk["text"])
                             chunk_metadatas.append(chunk["metadata"])
+                            chunk_cache_keys.append(cache_key)
                         
                         chunks_to_embed = [
                             text for text, embedding 
@@ -224,19 +241,17 @@ class KnowledgeBase:
                         ]
                         
                         if chunks_to_embed:
-                            self.logger.debug(f"Generating {len(chunks_to_embed)} embeddings for {file_path.name}")
+                            self.logger.debug("Generating %d embeddings for %s", len(chunks_to_embed), file_path.name)
                             new_embeddings = self._batch_generate_embeddings(chunks_to_embed, bedrock_client)
                             
                             embed_idx = 0
+                            new_cache_entries = []
                             for i, embedding in enumerate(chunk_embeddings):
                                 if embedding is None:
                                     chunk_embeddings[i] = new_embeddings[embed_idx]
-                                    self._save_cached_embedding(
-                                        chunk_texts[i], 
-                                        new_embeddings[embed_idx], 
-                                        cache_dir / f"{chunk_metadatas[i]['file_hash']}.json"
-                                    )
+                                    new_cache_entries.append((chunk_cache_keys[i], new_embeddings[embed_idx]))
                                     embed_idx += 1
+                            self._save_cached_embeddings(new_cache_entries, embedding_cache, cache_file)
                         
                         self.collection.add(
                             documents=chunk_texts,
@@ -246,7 +261,7 @@ class KnowledgeBase:
                         )
                         
                     except Exception as e:
-                        self.logger.error(f"Error processing {file_path}: {str(e)}")
+                        self.logger.exception(f"Error processing {file_path}: {str(e)}")
                         continue
                 
                 self.logger.success("\nKnowledge base scanning completed!")
@@ -255,10 +270,8 @@ class KnowledgeBase:
             pass
 
     def get_relevant_context(self, query: str, limit: int = 3) -> str:
-        bedrock_client = None
         try:
-            bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
-            query_embedding = generate_embeddings(query, self.app_config, bedrock_client)
+            query_embedding = generate_embeddings(query, self.app_config, self.bedrock_client)
             
             results = self.collection.query(
                 query_embeddings=[query_embedding],
@@ -278,33 +291,28 @@ class KnowledgeBase:
         finally:
             pass
 
-    def _get_cached_embedding(self, content: str, cache_file: Path) -> Optional[List[float]]:
-        if not cache_file.exists():
-            return None
-        
-        content_hash = hashlib.md5(content.encode()).hexdigest()
-        try:
-            with cache_file.open('r') as f:
-                cache = json.load(f)
-                return cache.get(content_hash)
-        except Exception as e:
-            self.logger.debug(f"Cache read error: {str(e)}")
-            return None
-
-    def _save_cached_embedding(self, content: str, embedding: List[float], cache_file: Path):
-        content_hash = hashlib.md5(content.encode()).hexdigest()
-        try:
-            cache = {}
-            if cache_file.exists():
+    def _load_embedding_cache(self, cache_file: Path) -> Dict[str, List[float]]:
+        cache = {}
+        if cache_file.exists():
+            try:
                 with cache_file.open('r') as f:
                     cache = json.load(f)
-            
-            cache[content_hash] = embedding
-            
+            except Exception as e:
+                self.logger.debug("Cache read error: %s", e)
+        return cache
+
+    @staticmethod
+    def _embedding_cache_key(content: str) -> str:
+        return hashlib.md5(content.encode()).hexdigest()
+
+    def _save_cached_embeddings(self, entries: List[Tuple[str, List[float]]], cache: Dict[str, List[float]], cache_file: Path):
+        for cache_key, embedding in entries:
+            cache[cache_key] = embedding
+        try:
             with cache_file.open('w') as f:
                 json.dump(cache, f)
         except Exception as e:
-            self.logger.debug(f"Cache write error: {str(e)}")
+            self.logger.debug("Cache write error: %s", e)
 
     def _batch_generate_embeddings(self, texts: List[str], bedrock_client) -> List[List[float]]:
         embeddings = []
@@ -330,7 +338,7 @@ class KnowledgeBase:
                 embeddings.extend(batch_embeddings)
                 
             except Exception as e:
-                self.logger.debug(f"Batch embedding failed: {str(e)}, falling back to individual processing")
+                self.logger.debug("Batch embedding failed: %s, falling back to individual processing", e)
                 for text in batch:
                     try:
                         embedding = generate_embeddings(text, self.app_config, bedrock_client)
@@ -1,27 +1,30 @@
 import datetime
 import hashlib
 import json
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
-import chromadb
-from chromadb.config import Settings
 from pipebot.aws import create_bedrock_client
 from pipebot.ai.embeddings import generate_embeddings
 from pipebot.config import AppConfig
+from pipebot.memory.chroma import create_chroma_client
 
 class MemoryManager:
     def __init__(self, app_config: AppConfig, debug=False):
         self.app_config = app_config
         self.collection = self.setup_memory()
         self.debug = debug
+        self._bedrock_client = None
+        self._store_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_stores = []
+
+    @property
+    def bedrock_client(self):
+        if self._bedrock_client is None:
+            self._bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
+        return self._bedrock_client
 
     def setup_memory(self):
-        Path(self.app_config.storage.memory_dir).mkdir(parents=True, exist_ok=True)
-        
-        client = chromadb.PersistentClient(
-            path=self.app_config.storage.memory_dir, 
-            settings=Settings(anonymized_telemetry=False)
-        )
+        client = create_chroma_client(self.app_config)
         
         try:
             collection = client.get_collection(self.app_config.storage.collection_name)
@@ -33,11 +36,23 @@ class MemoryManager:
         
         return collection
 
-    def get_relevant_history(self, query: str, limit: int = 3) -> List[Dict[str, str]]:
-        bedrock_client = None
+    def get_and_store(self, query: str, limit: int = 3) -> List[Dict[str, str]]:
+        self._report_store_errors()
+        if not query or not isinstance(query, str):
+            return []
+        
+        try:
+            query_embedding = generate_embeddings(query, self.app_config, self.bedrock_client)
+        except Exception as e:
+            print(f"Warning: Error querying memory: {str(e)}")
+            return []
+        
+        history = self._query_history(query_embedding, limit)
+        self.store_interaction("user", query, embeddings=query_embedding)
+        return history
+
+    def _query_history(self, query_embedding: List[float], limit: int) -> List[Dict[str, str]]:
         try:
-            bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
-            query_embedding = generate_embeddings(query, self.app_config, bedrock_client)
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=limit
@@ -60,24 +75,38 @@ class MemoryManager:
                 })
         return history
 
-    def store_interaction(self, role: str, content: str):
+    def store_interaction(self, role: str, content: str, embeddings: Optional[List[float]] = None):
         if not content or not isinstance(content, str):
             return
         
         timestamp = datetime.datetime.now().isoformat()
+        self._pending_stores.append(
+            self._store_executor.submit(self._store_interaction, role, content, timestamp, embeddings)
+        )
+
+    def close(self):
+        self._report_store_errors(wait=True)
+        self._store_executor.shutdown()
+
+    def _report_store_errors(self, wait: bool = False):
+        pending = []
+        for future in self._pending_stores:
+            if not wait and not future.done():
+                pending.append(future)
+            elif future.exception() is not None:
+                print(f"Warning: Error storing memory: {str(future.exception())}")
+        self._pending_stores = pending
+
+    def _store_interaction(self, role: str, content: str, timestamp: str, embeddings: Optional[List[float]]):
         content_hash = hashlib.md5(content.encode()).hexdigest()
         id = f"{timestamp}-{content_hash}"
         
-        bedrock_client = None
-        try:
-            bedrock_client = create_bedrock_client(self.app_config, debug=self.debug)
-            embeddings = generate_embeddings(content, self.app_config, bedrock_client)
-            
-            self.collection.add(
-                documents=[content],
-                metadatas=[{"role": role, "timestamp": timestamp}],
-                ids=[id],
-                embeddings=[embeddings]
-            )
-        except Exception as e:
-            print(f"Warning: Error storing memory: {str(e)}") 
\ No newline at end of file
+        if embeddings is None:
+            embeddings = generate_embeddings(content, self.app_config, self.bedrock_client)
+        
+        self.collection.add(
+            documents=[content],
+            metadatas=[{"role": role, "timestamp": timestamp}],
+            ids=[id],
+            embeddings=[embeddings]
+        )
@@ -1,5 +1,5 @@
 import shlex
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List, Tuple
 from pipebot.tools.executor import CommandExecutor
 from pipebot.config import AppConfig
 import urllib.parse
@@ -8,6 +8,92 @@ from bs4 import BeautifulSoup
 import os
 import json
 
+AWS_ALLOWED_COMMANDS = (
+    'analyze', 'check', 'describe', 'estimate', 'export',
+    'filter', 'generate', 'get', 'help', 'list', 'lookup',
+    'ls', 'preview', 'scan', 'search', 'show', 
+    'summarize', 'test', 'validate', 'view'
+)
+AWS_DISALLOWED_OPTIONS = frozenset({'--profile'})
+
+HELM_ALLOWED_COMMANDS = (
+    'dependency', 'env', 'get', 'history', 'inspect', 'lint',
+    'list', 'search', 'show', 'status', 'template', 'verify', 'version'
+)
+HELM_DISALLOWED_OPTIONS = frozenset({'--kube-context', '--kubeconfig'})
+
+KUBECTL_ALLOWED_COMMANDS = (
+    'api-resources', 'api-versions', 'cluster-info', 'describe', 
+    'explain', 'get', 'logs', 'top', 'version'
+)
+KUBECTL_DISALLOWED_OPTIONS = frozenset({'--kubeconfig', '--as', '--as-group', '--token'})
+
+PYTHON_ALLOWED_MODULES = {
+    'array': 'array',
+    'base64': 'base64',
+    'binascii': 'binascii',
+    'bisect': 'bisect',
+    'bson': 'bson',
+    'calendar': 'calendar',
+    'cmath': 'cmath',
+    'codecs': 'codecs',
+    'collections': 'collections',
+    'datetime': 'datetime',
+    'difflib': 'difflib',
+    'enum': 'enum',
+    'fractions': 'fractions',
+    'functools': 'functools',
+    'gzip': 'gzip',
+    'hashlib': 'hashlib',
+    'heapq': 'heapq',
+    'itertools': 'itertools',
+    'json': 'json',
+    'math': 'math',
+    'matplotlib': 'matplotlib',
+    'mpmath': 'mpmath',
+    'numpy': 'np',
+    'operator': 'operator',
+    'pandas': 'pd',
+    'pymongo': 'pymongo',
+    're': 're',
+    'random': 'random',
+    'sklearn': 'sklearn',
+    'secrets': 'secrets',
+    'scipy.special': 'scipy_special',
+    'statistics': 'statistics',
+    'string': 'string',
+    'sympy': 'sympy',
+    'textwrap': 'textwrap',
+    'time': 'time',
+    'timeit': 'timeit',
+    'unicodedata': 'unicodedata',
+    'uuid': 'uuid',
+    'zlib': 'zlib'
+}
+
+def _safe_import(name, *args, **kwargs):
+    base_module = name.split('.')[0]
+    if base_module not in PYTHON_ALLOWED_MODULES:
+        raise ImportError(f"Import of '{base_module}' is not allowed. Allowed modules are: {', '.join(PYTHON_ALLOWED_MODULES.keys())}")
+    return __import__(name, *args, **kwargs)
+
+PYTHON_SAFE_BUILTINS = {
+    'abs': abs, 'all': all, 'any': any, 'ascii': ascii,
+    'bin': bin, 'bool': bool, 'bytearray': bytearray,
+    'bytes': bytes, 'chr': chr, 'complex': complex,
+    'dict': dict, 'divmod': divmod, 'enumerate': enumerate,
+    'filter': filter, 'float': float, 'format': format,
+    'frozenset': frozenset, 'hash': hash, 'hex': hex,
+    'int': int, 'isinstance': isinstance, 'issubclass': issubclass,
+    'iter': iter, 'len': len, 'list': list, 'map': map,
+    'max': max, 'min': min, 'next': next, 'oct': oct,
+    'ord': ord, 'pow': pow, 'print': print, 'range': range,
+    'repr': repr, 'reversed': reversed, 'round': round,
+    'set': set, 'slice': slice, 'sorted': sorted, 'str': str,
+    'sum': sum, 'tuple': tuple, 'type': type, 'zip': zip,
+    '__import__': _safe_import
+}
+
 class ToolExecutor:
     @staticmethod
     def _parse_command(command: str) -> List[str]:
@@ -34,7 +120,7 @@ class ToolExecutor:
         return result
 
     @staticmethod
-    def _validate_tool_command(command: str, tool_name: str, allowed_commands: List[str], disallowed_options: List[str], command_index: int) -> bool:
+    def _validate_tool_command(command: str, tool_name: str, allowed_commands: Tuple[str, ...], disallowed_options: FrozenSet[str], command_index: int) -> bool:
         try:
             cmd_parts = shlex.split(command)
             
@@ -53,11 +139,11 @@ class ToolExecutor:
             
             command_to_validate = cmd_parts[validate_index]
             
-            if not any(command_to_validate.startswith(allowed_cmd) for allowed_cmd in allowed_commands):
+            if not command_to_validate.startswith(allowed_commands):
                 raise ValueError(f"Only specific read-only {tool_name} commands are allowed. Allowed commands are: {', '.join(allowed_commands)}")
             
-            if any(option in cmd_parts for option in disallowed_options):
-                raise ValueError(f"Disallowed options detected. The following options are not permitted: {', '.join(disallowed_options)}")
+            if not disallowed_options.isdisjoint(cmd_parts):
+                raise ValueError(f"Disallowed options detected. The following options are not permitted: {', '.join(sorted(disallowed_options))}")
             
             return True
             
@@ -65,7 +151,7 @@ class ToolExecutor:
             raise ValueError(f"Error validating {tool_name} command: {str(e)}")
 
     @staticmethod
-    def _execute_tool_command(command: str, tool_name: str, allowed_commands: List[str], disallowed_options: List[str], command_index: int, app_config: AppConfig = None) -> Dict[str, Any]:
+    def _execute_tool_command(command: str, tool_name: str, allowed_commands: Tuple[str, ...], disallowed_options: FrozenSet[str], command_index: int, app_config: AppConfig = None) -> Dict[str, Any]:
         try:
             full_command = f"{tool_name} {command}" if not command.strip().startswith(tool_name) else command
             
@@ -83,32 +169,15 @@ class ToolExecutor:
 
     @staticmethod
     def aws(command: str, app_config: AppConfig = None) -> Dict[str, Any]:
-        allowed_commands = [
-            'analyze', 'check', 'describe', 'estimate', 'export',
-            'filter', 'generate', 'get', 'help', 'list', 'lookup',
-            'ls', 'preview', 'scan', 'search', 'show', 
-            'summarize', 'test', 'validate', 'view'
-        ]
-        disallowed_options = ['--profile']
-        return ToolExecutor._execute_tool_command(command, "aws", allowed_commands, disallowed_options, 1, app_config)
+        return ToolExecutor._execute_tool_command(command, "aws", AWS_ALLOWED_COMMANDS, AWS_DISALLOWED_OPTIONS, 1, app_config)
 
     @staticmethod
     def helm(command: str, app_config: AppConfig = None) -> Dict[str, Any]:
-        allowed_commands = [
-            'dependency', 'env', 'get', 'history', 'inspect', 'lint',
-            'list', 'search', 'show', 'status', 'template', 'verify', 'version'
-        ]
-        disallowed_options = ['--kube-context', '--kubeconfig']
-        return ToolExecutor._execute_tool_command(command, "helm", allowed_commands, disallowed_options, 0, app_config)
+        return ToolExecutor._execute_tool_command(command, "helm", HELM_ALLOWED_COMMANDS, HELM_DISALLOWED_OPTIONS, 0, app_config)
 
     @staticmethod
     def kubectl(command: str, app_config: AppConfig = None) -> Dict[str, Any]:
-        allowed_commands = [
-            'api-resources', 'api-versions', 'cluster-info', 'describe', 
-            'explain', 'get', 'logs', 'top', 'version'
-        ]
-        disallowed_options = ['--kubeconfig', '--as', '--as-group', '--token']
-        return ToolExecutor._execute_tool_command(command, "kubectl", allowed_commands, disallowed_options, 0, app_config)
+        return ToolExecutor._execute_tool_command(command, "kubectl", KUBECTL_ALLOWED_COMMANDS, KUBECTL_DISALLOWED_OPTIONS, 0, app_config)
 
     @staticmethod
     def serper(query: str, app_config: AppConfig = None) -> Dict[str, Any]:
@@ -154,79 +223,13 @@ class ToolExecutor:
     @staticmethod
     def python_exec(code: str) -> Dict[str, Any]:
         try:
-            # Define allowed modules
-            ALLOWED_MODULES = {
-                'array': 'array',
-                'base64': 'base64',
-                'binascii': 'binascii',
-                'bisect': 'bisect',
-                'bson': 'bson',
-                'calendar': 'calendar',
-                'cmath': 'cmath',
-                'codecs': 'codecs',
-                'collections': 'collections',
-                'datetime': 'datetime',
-                'difflib': 'difflib',
-                'enum': 'enum',
-                'fractions': 'fractions',
-                'functools': 'functools',
-                'gzip': 'gzip',
-                'hashlib': 'hashlib',
-                'heapq': 'heapq',
-                'itertools': 'itertools',
-                'json': 'json',
-                'math': 'math',
-                'matplotlib': 'matplotlib',
-                'mpmath': 'mpmath',
-                'numpy': 'np',
-                'operator': 'operator',
-                'pandas': 'pd',
-                'pymongo': 'pymongo',
-                're': 're',
-                'random': 'random',
-                'sklearn': 'sklearn',
-                'secrets': 'secrets',
-                'scipy.special': 'scipy_special',
-                'statistics': 'statistics',
-                'string': 'string',
-                'sympy': 'sympy',
-                'textwrap': 'textwrap',
-                'time': 'time',
-                'timeit': 'timeit',
-                'unicodedata': 'unicodedata',
-                'uuid': 'uuid',
-                'zlib': 'zlib'
-            }
-
-            # Create a restricted globals dictionary with a safe __import__
-            def safe_import(name, *args, **kwargs):
-                base_module = name.split('.')[0]
-                if base_module not in ALLOWED_MODULES:
-                    raise ImportError(f"Import of '{base_module}' is not allowed. Allowed modules are: {', '.join(ALLOWED_MODULES.keys())}")
-                return __import__(name, *args, **kwargs)
-
             # Create a restricted globals dictionary
             restricted_globals = {
-                '__builtins__': {
-                    'abs': abs, 'all': all, 'any': any, 'ascii': ascii,
-                    'bin': bin, 'bool': bool, 'bytearray': bytearray,
-                    'bytes': bytes, 'chr': chr, 'complex': complex,
-                    'dict': dict, 'divmod': divmod, 'enumerate': enumerate,
-                    'filter': filter, 'float': float, 'format': format,
-                    'frozenset': frozenset, 'hash': hash, 'hex': hex,
-                    'int': int, 'isinstance': isinstance, 'issubclass': issubclass,
-                    'iter': iter, 'len': len, 'list': list, 'map': map,
-                    'max': max, 'min': min, 'next': next, 'oct': oct,
-                    'ord': ord, 'pow': pow, 'print': print, 'range': range,
-                    'repr': repr, 'reversed': reversed, 'round': round,
-                    'set': set, 'slice': slice, 'sorted': sorted, 'str': str,
-                    'sum': sum, 'tuple': tuple, 'type': type, 'zip': zip,
-                    '__import__': safe_import  # Add safe_import function
-                }
+                '__builtins__': dict(PYTHON_SAFE_BUILTINS)
             }
 
             # Pre-import allowed modules
-            for module_name, alias in ALLOWED_MODULES.items():
+            for module_name, alias in PYTHON_ALLOWED_MODULES.items():
                 try:
                     module = __import__(module_name)
                     restricted_globals[alias] = module